@@ -1,4 +1,5 @@
 import os
+import threading
 from datetime import timedelta
 from flask import Flask, request, jsonify
 from flask_cors import CORS
@@ -7,14 +8,38 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 
 from models import db, User, Comment
-# ML predictor (lazy import)
-try:
-    from ml.infer_classifier import Predictor
-except Exception:
-    Predictor = None
 
 load_dotenv()
 
+# Held while the shared predictor is created and its weights are loaded, so
+# concurrent first requests load the model once instead of once per thread.
+_predictor_lock = threading.Lock()
+
+
+def _env_flag(name, default='0'):
+    return os.getenv(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_predictor(app):
+    """Return the app's shared Predictor, loading it on first use.
+
+    `ml.infer_classifier` (and with it torch/torchvision) is only imported here,
+    so processes that never serve inference never pay for loading torch. The
+    predictor is only cached once its weights have loaded, so a failed load
+    (e.g. missing weights) is retried and reported on the next call.
+    """
+    predictor = app.config.get('PREDICTOR')
+    if predictor is not None:
+        return predictor
+    with _predictor_lock:
+        predictor = app.config.get('PREDICTOR')
+        if predictor is None:
+            from ml.infer_classifier import Predictor
+            predictor = Predictor(weights_path=app.config.get('CLASSIFIER_WEIGHTS')).load()
+            app.config['PREDICTOR'] = predictor
+    return predictor
+
+
 def create_app():
     app = Flask(__name__)
 
@@ -23,6 +48,11 @@ def create_app():
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
+    # ML_ENABLED=0 runs an auth/comments-only worker that never imports torch.
+    # PRELOAD_MODEL=1 loads the classifier at startup instead of on the first /api/infer.
+    app.config['ML_ENABLED'] = _env_flag('ML_ENABLED', '1')
+    app.config['PRELOAD_MODEL'] = _env_flag('PRELOAD_MODEL')
+    app.config['CLASSIFIER_WEIGHTS'] = os.getenv('CLASSIFIER_WEIGHTS') or None
 
     db.init_app(app)
     jwt = JWTManager(app)
@@ -35,6 +65,13 @@ def create_app():
     allowed_origins = [origin for origin in allowed_origins if origin]  # Remove empty strings
     CORS(app, origins=allowed_origins, supports_credentials=True)
 
+    if app.config['ML_ENABLED'] and app.config['PRELOAD_MODEL']:
+        # Don't fail startup (or init_db.py) over the model; /api/infer reports it.
+        try:
+            get_predictor(app)
+        except Exception as e:
+            app.logger.warning('Classifier preload failed, will retry on first /api/infer: %s', e)
+
     @app.route('/api/ping')
     def ping():
         return jsonify({'ok': True, 'message': 'pong'})
@@ -122,18 +159,25 @@ def create_app():
         img_file = request.files['image']
         img_bytes = img_file.read()
 
-        if Predictor is None:
+        if not app.config['ML_ENABLED']:
+            return jsonify({'error': 'inference is disabled on this server (ML_ENABLED=0)'}), 503
+
+        try:
+            predictor = get_predictor(app)
+        except FileNotFoundError as e:
+            return jsonify({'error': str(e), 'note': 'Train a classifier first. See backend/ml/README.md for instructions.'}), 500
+        except (ImportError, OSError):
+            # A broken torch install often fails with OSError (missing shared library / DLL).
             return jsonify({'error': 'ML predictor not available on server. Ensure ml package exists and dependencies are installed.'}), 500
+        except Exception as e:
+            return jsonify({'error': 'failed to load classifier', 'detail': str(e)}), 500
 
         try:
-            predictor = app.config.get('PREDICTOR')
-            if predictor is None:
-                predictor = Predictor()
-                app.config['PREDICTOR'] = predictor
             result = predictor.predict_image(img_bytes)
             return jsonify(result)
-        except FileNotFoundError as e:
-            return jsonify({'error': str(e), 'note': 'Train a classifier first. See backend/ml/README.md for instructions.'}), 500
+        except OSError as e:
+            # Pillow raises OSError subclasses for unreadable or truncated images.
+            return jsonify({'error': 'could not decode image', 'detail': str(e)}), 400
         except Exception as e:
             return jsonify({'error': 'inference failed', 'detail': str(e)}), 500
 
@@ -0,0 +1,397 @@
+"""End-to-end load test and regression benchmark for the backend API.
+
+Starts `app.py` in a subprocess against a throwaway SQLite database and a
+randomly initialized ResNet18 weights file (no trained model needed), then
+drives mixed traffic at signup/login, comment GET/POST and /api/infer from a
+pool of concurrent clients. Throughput and p50/p95/p99 latency are reported
+per endpoint.
+
+Usage (from backend/):
+    python bench/load_test.py --requests 1000 --concurrency 8
+    python bench/load_test.py --save-baseline bench/baseline.json
+    python bench/load_test.py --compare bench/baseline.json --tolerance 0.25
+
+`--compare` exits with status 1 if any endpoint's (or the overall) p95 latency
+or throughput is worse than the baseline by more than the tolerance, or its
+error count grew, and with status 2 if the run settings (--requests,
+--concurrency, --warmup, --users, --mix, --preload) differ from the baseline's.
+Only compare runs made on the same machine. `--save-baseline` refuses to
+overwrite an existing baseline unless `--force` is given.
+"""
+import argparse
+import http.client
+import io
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from random_weights import make_random_weights
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run settings that must match between a result and the baseline it is compared to.
+COMPARABLE_CONFIG = ('requests', 'concurrency', 'warmup', 'users', 'mix', 'preload')
+
+# Relative share of each endpoint in the generated traffic.
+DEFAULT_MIX = {
+    'signup': 0.05,
+    'login': 0.20,
+    'get_comments': 0.40,
+    'post_comment': 0.25,
+    'infer': 0.10,
+}
+
+
+def make_test_image(width=640, height=480):
+    """Return JPEG bytes of a random-noise image, roughly the size of a phone upload."""
+    from PIL import Image
+
+    img = Image.frombytes('RGB', (width, height), os.urandom(width * height * 3))
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=85)
+    return buf.getvalue()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, weights_path, preload=False, timeout=120):
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        DATABASE_URL='sqlite:///' + os.path.join(workdir, 'bench.db').replace('\\', '/'),
+        CLASSIFIER_WEIGHTS=weights_path,
+        ML_ENABLED='1',
+        PRELOAD_MODEL='1' if preload else '0',
+        FLASK_ENV='production',
+    )
+    log_path = os.path.join(workdir, 'server.log')
+    with open(log_path, 'wb') as log:
+        proc = subprocess.Popen([sys.executable, 'app.py'], cwd=BACKEND_DIR, env=env,
+                                stdout=subprocess.DEVNULL, stderr=log)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited during startup with code {proc.returncode}:\n{log_tail(log_path)}')
+        try:
+            with urllib.request.urlopen(base_url + '/api/ping', timeout=1):
+                return proc, base_url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    proc.terminate()
+    proc.wait(timeout=10)
+    raise RuntimeError(f'server did not answer /api/ping within {timeout}s:\n{log_tail(log_path)}')
+
+
+def log_tail(path, lines=20):
+    with open(path, errors='replace') as f:
+        return ''.join(f.readlines()[-lines:]).rstrip()
+
+
+class Client:
+    """Minimal stdlib HTTP client; returns (status, parsed JSON or None).
+
+    Transport failures (refused/reset connections, timeouts) return status 0
+    so they are counted as errors instead of aborting the run.
+    """
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def request(self, method, path, json_body=None, token=None, files=None):
+        headers = {}
+        data = None
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif files:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for field, (filename, content, mimetype) in files.items():
+                parts.append(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; '
+                    f'filename="{filename}"\r\nContent-Type: {mimetype}\r\n\r\n'.encode()
+                    + content + b'\r\n'
+                )
+            data = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                status, body = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (urllib.error.URLError, http.client.HTTPException, OSError):
+            return 0, None
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, None
+
+
+class Workload:
+    """Generates the mixed traffic; each call returns (endpoint, latency_s, ok)."""
+
+    def __init__(self, client, image_bytes, mix, n_users=20, n_reports=20, seed=0):
+        self.client = client
+        self.image_bytes = image_bytes
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.n_reports = n_reports
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.run_id = uuid.uuid4().hex[:8]
+        self.password = 'bench-password'
+        self.users = []  # (email, token)
+        for _ in range(n_users):
+            status, body = self._signup()
+            if status != 201:
+                raise RuntimeError(f'seeding users failed: {status} {body}')
+            self.users.append((body['user']['email'], body['access_token']))
+
+    def _signup(self):
+        email = f'bench-{self.run_id}-{uuid.uuid4().hex[:12]}@example.com'
+        return self.client.request('POST', '/api/signup',
+                                   {'name': 'Bench User', 'email': email, 'password': self.password})
+
+    def _choose(self):
+        with self.rng_lock:
+            endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+            user = self.rng.choice(self.users)
+            report_id = self.rng.randint(1, self.n_reports)
+        return endpoint, user, report_id
+
+    def step(self, _=None):
+        endpoint, (email, token), report_id = self._choose()
+        start = time.perf_counter()
+        if endpoint == 'signup':
+            status, _ = self._signup()
+            ok = status == 201
+        elif endpoint == 'login':
+            status, _ = self.client.request('POST', '/api/login', {'email': email, 'password': self.password})
+            ok = status == 200
+        elif endpoint == 'get_comments':
+            status, _ = self.client.request('GET', f'/api/reports/{report_id}/comments')
+            ok = status == 200
+        elif endpoint == 'post_comment':
+            status, _ = self.client.request('POST', f'/api/reports/{report_id}/comments',
+                                            {'text': 'benchmark comment'}, token=token)
+            ok = status == 201
+        else:
+            status, _ = self.client.request('POST', '/api/infer',
+                                            files={'image': ('bench.jpg', self.image_bytes, 'image/jpeg')})
+            ok = status == 200
+        return endpoint, time.perf_counter() - start, ok
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples, elapsed):
+    by_endpoint = {}
+    for endpoint, latency, ok in samples:
+        by_endpoint.setdefault(endpoint, []).append((latency, ok))
+
+    endpoints = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = sorted(latency for latency, _ in rows)
+        endpoints[endpoint] = {
+            'requests': len(rows),
+            'errors': sum(1 for _, ok in rows if not ok),
+            'throughput_rps': len(rows) / elapsed,
+            'mean_ms': 1000 * sum(latencies) / len(latencies),
+            'p50_ms': 1000 * percentile(latencies, 50),
+            'p95_ms': 1000 * percentile(latencies, 95),
+            'p99_ms': 1000 * percentile(latencies, 99),
+        }
+
+    all_latencies = sorted(latency for _, latency, _ in samples)
+    overall = {
+        'requests': len(samples),
+        'errors': sum(1 for _, _, ok in samples if not ok),
+        'throughput_rps': len(samples) / elapsed,
+        'p50_ms': 1000 * percentile(all_latencies, 50),
+        'p95_ms': 1000 * percentile(all_latencies, 95),
+        'p99_ms': 1000 * percentile(all_latencies, 99),
+    }
+    return {'elapsed_s': elapsed, 'overall': overall, 'endpoints': endpoints}
+
+
+def print_report(result):
+    print(f"{'endpoint':<14} {'reqs':>6} {'errs':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = list(result['endpoints'].items()) + [('overall', result['overall'])]
+    for name, r in rows:
+        print(f"{name:<14} {r['requests']:6d} {r['errors']:5d} {r['throughput_rps']:8.1f} "
+              f"{r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f}")
+
+
+def config_mismatches(config, baseline):
+    """Return the run settings that differ between `config` and `baseline`."""
+    current, base = config, baseline.get('config', {})
+    return [f'{key}: {current.get(key)!r} vs baseline {base.get(key)!r}'
+            for key in COMPARABLE_CONFIG if current.get(key) != base.get(key)]
+
+
+def compare(result, baseline, tolerance):
+    """Return a list of human-readable regressions against `baseline`."""
+    regressions = []
+    pairs = [(name, result['endpoints'].get(name), base) for name, base in baseline['endpoints'].items()]
+    pairs.append(('overall', result['overall'], baseline['overall']))
+    for endpoint, current, base in pairs:
+        if current is None:
+            regressions.append(f'{endpoint}: no requests in this run')
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p95 {current['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+        if current['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{endpoint}: {current['throughput_rps']:.1f} rps "
+                               f"vs baseline {base['throughput_rps']:.1f} rps")
+        if current['errors'] > base['errors']:
+            regressions.append(f"{endpoint}: {current['errors']} errors vs baseline {base['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help='Measured requests (after warmup)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests sent first')
+    parser.add_argument('--users', type=int, default=20, help='Users created before the run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mix', help='Traffic mix as JSON, e.g. \'{"login": 1, "infer": 1}\'')
+    parser.add_argument('--image', help='Image to POST to /api/infer (default: generated 640x480 JPEG)')
+    parser.add_argument('--weights', help='Classifier weights (default: random ResNet18 in a temp dir)')
+    parser.add_argument('--preload', action='store_true', help='Start the server with PRELOAD_MODEL=1')
+    parser.add_argument('--url', help='Benchmark an already running server instead of starting one')
+    parser.add_argument('--json', help='Write results to this path')
+    parser.add_argument('--save-baseline', help='Write results to this path as the new baseline (see --force)')
+    parser.add_argument('--force', action='store_true', help='Allow --save-baseline to overwrite an existing file')
+    parser.add_argument('--compare', help='Baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression (default 0.25)')
+    args = parser.parse_args()
+
+    if args.save_baseline and os.path.exists(args.save_baseline) and not args.force:
+        parser.error(f'{args.save_baseline} already exists; pass --force to replace the baseline')
+
+    for name in ('requests', 'concurrency', 'users'):
+        if getattr(args, name) < 1:
+            parser.error(f'--{name} must be at least 1')
+    if args.warmup < 0:
+        parser.error('--warmup must not be negative')
+    if args.tolerance < 0:
+        parser.error('--tolerance must not be negative')
+    if args.url and args.preload:
+        parser.error('--preload has no effect with --url; set PRELOAD_MODEL on that server instead')
+
+    try:
+        mix = json.loads(args.mix) if args.mix else DEFAULT_MIX
+    except ValueError as e:
+        parser.error(f'--mix is not valid JSON: {e}')
+    if not isinstance(mix, dict) or not mix:
+        parser.error('--mix must be a non-empty JSON object of endpoint: weight')
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        parser.error(f'unknown endpoints in --mix: {sorted(unknown)}')
+    if any(not isinstance(w, (int, float)) or isinstance(w, bool) or w < 0 for w in mix.values()):
+        parser.error('--mix weights must be non-negative numbers')
+    if sum(mix.values()) <= 0:
+        parser.error('--mix needs at least one positive weight')
+
+    if args.image:
+        with open(args.image, 'rb') as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = make_test_image()
+
+    config = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'warmup': args.warmup,
+        'users': args.users,
+        'seed': args.seed,
+        'mix': mix,
+        'preload': args.preload,
+        'image_bytes': len(image_bytes),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+
+    # Refuse an incomparable baseline before spending time on the run.
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        mismatches = config_mismatches(config, baseline)
+        if mismatches:
+            print(f'Cannot compare with {args.compare}: run settings differ:')
+            for line in mismatches:
+                print('  ' + line)
+            sys.exit(2)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = None
+        if args.url:
+            base_url = args.url.rstrip('/')
+        else:
+            weights = args.weights or make_random_weights(os.path.join(workdir, 'classifier.pth'))
+            server, base_url = start_server(workdir, os.path.abspath(weights), preload=args.preload)
+        try:
+            workload = Workload(Client(base_url), image_bytes, mix, n_users=args.users, seed=args.seed)
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                list(pool.map(workload.step, range(args.warmup)))
+                start = time.perf_counter()
+                samples = list(pool.map(workload.step, range(args.requests)))
+                elapsed = time.perf_counter() - start
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+    result = summarize(samples, elapsed)
+    result['config'] = config
+    result['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    print_report(result)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(result, f, indent=2)
+            print('Saved results to', path)
+
+    if args.compare:
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f'Regressions vs {args.compare} (tolerance {args.tolerance:.0%}):')
+            for line in regressions:
+                print('  ' + line)
+            sys.exit(1)
+        print(f'No regressions vs {args.compare} (tolerance {args.tolerance:.0%}).')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+"""Randomly initialized classifier weights for benchmarks that need no trained model."""
+
+
+def make_random_weights(path, seed=0):
+    """Save a randomly initialized resnet18 state dict matching `Predictor` to `path`."""
+    import torch
+    import torchvision.models as models
+
+    torch.manual_seed(seed)
+    model = models.resnet18(pretrained=False)
+    model.fc = torch.nn.Linear(model.fc.in_features, 2)
+    torch.save(model.state_dict(), path)
+    return path
@@ -0,0 +1,125 @@
+"""Measure backend startup time and memory with and without the ML stack.
+
+Each mode starts a fresh interpreter that imports `app`, calls `create_app()`
+and reports timings, peak RSS and whether torch ended up in `sys.modules`.
+
+Modes:
+    api        ML_ENABLED=0 - auth/comments-only worker, torch never imported
+    lazy       default settings - torch is deferred until the first /api/infer
+    inference  PRELOAD_MODEL=1 - torch imported and classifier loaded at startup
+               (random ResNet18 weights are used unless --weights is given)
+
+Usage (from backend/):
+    python bench/startup.py --runs 5
+    python bench/startup.py --weights ml/weights/classifier.pth --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from random_weights import make_random_weights
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'api': {'ML_ENABLED': '0', 'PRELOAD_MODEL': '0'},
+    'lazy': {'ML_ENABLED': '1', 'PRELOAD_MODEL': '0'},
+    'inference': {'ML_ENABLED': '1', 'PRELOAD_MODEL': '1'},
+}
+
+# Runs inside the child process; prints a single JSON line.
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+except ImportError:
+    rss_mb = None
+print(json.dumps({
+    'import_s': t1 - t0,
+    'create_app_s': t2 - t1,
+    'peak_rss_mb': rss_mb,
+    'torch_loaded': 'torch' in sys.modules,
+}))
+"""
+
+
+def run_once(mode, weights=None):
+    env = dict(os.environ, **MODES[mode])
+    if weights:
+        env['CLASSIFIER_WEIGHTS'] = os.path.abspath(weights)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f'{mode} startup failed:\n{proc.stderr.strip()}')
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['wall_s'] = wall
+    return result
+
+
+def summarize(samples):
+    summary = {'runs': len(samples), 'torch_loaded': samples[-1]['torch_loaded']}
+    for key in ('wall_s', 'import_s', 'create_app_s', 'peak_rss_mb'):
+        values = [s[key] for s in samples if s[key] is not None]
+        summary[key] = statistics.median(values) if values else None
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--runs', type=int, default=3, help='Fresh processes per mode (median is reported)')
+    parser.add_argument('--weights', help='Classifier weights for the inference mode (default: random ResNet18)')
+    parser.add_argument('--json', help='Optional path to write the results as JSON')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        weights = args.weights
+        modes = list(args.modes)
+        if weights is None and 'inference' in modes:
+            try:
+                weights = make_random_weights(os.path.join(workdir, 'classifier.pth'))
+            except Exception as e:
+                # e.g. torch not installed on an auth-only box; still measure the other modes.
+                msg = f'inference: could not create random weights: {e!r}'
+                print(msg, file=sys.stderr)
+                results['inference'] = {'error': msg}
+                modes.remove('inference')
+        for mode in modes:
+            try:
+                results[mode] = summarize([run_once(mode, weights) for _ in range(args.runs)])
+            except RuntimeError as e:
+                print(e, file=sys.stderr)
+                results[mode] = {'error': str(e)}
+    results = {mode: results[mode] for mode in args.modes}
+
+    print(f"{'mode':<10} {'wall s':>8} {'import s':>9} {'create s':>9} {'rss MB':>8}  torch")
+    for mode, r in results.items():
+        if 'error' in r:
+            print(f'{mode:<10} failed (see stderr)')
+            continue
+        rss = f"{r['peak_rss_mb']:8.1f}" if r['peak_rss_mb'] is not None else f"{'n/a':>8}"
+        print(f"{mode:<10} {r['wall_s']:8.3f} {r['import_s']:9.3f} {r['create_app_s']:9.3f} {rss}  {r['torch_loaded']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Saved results to', args.json)
+
+
+if __name__ == '__main__':
+    main()
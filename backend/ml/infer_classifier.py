@@ -22,6 +22,12 @@ class Predictor:
         self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = None
 
+    def load(self):
+        """Load the weights now instead of on the first prediction."""
+        if self.model is None:
+            self._load_model()
+        return self
+
     def _load_model(self):
         if not os.path.exists(self.weights_path):
             raise FileNotFoundError(f"Classifier weights not found at {self.weights_path}")
@@ -36,8 +42,7 @@ class Predictor:
         self.model = model
 
     def predict_image(self, image_bytes: bytes) -> Dict:
-        if self.model is None:
-            self._load_model()
+        self.load()
 
         img = Image.open(io.BytesIO(image_bytes)).convert('RGB')
         transform = T.Compose([